@@ -6,7 +6,7 @@ Generate a performance dashboard from benchmark results
 import os
 import re
 import json
-import glob
+import functools
 from datetime import datetime
 from pathlib import Path
 from collections import defaultdict
@@ -17,12 +17,31 @@ try:
     matplotlib.use('Agg')  # Use non-interactive backend
     import matplotlib.pyplot as plt
     import matplotlib.dates as mdates
+    import numpy as np  # Always installed alongside matplotlib
     MATPLOTLIB_AVAILABLE = True
 except ImportError:
     MATPLOTLIB_AVAILABLE = False
     print("Warning: matplotlib not installed. Charts will not be generated.")
     print("To install matplotlib, run: pip install matplotlib")
 
+# Nanoseconds per time unit, including the different microsecond representations
+_UNIT_MUL = {
+    'ns': 1,
+    'us': 1_000,
+    'µs': 1_000,
+    'μs': 1_000,
+    'ms': 1_000_000,
+    's': 1_000_000_000,
+}
+
+# Pattern to match benchmark results with various time units including Unicode µ
+_BENCH_RE = re.compile(r'(\w+)\s+time:\s+\[([0-9.]+)\s+([µμ]?[a-zA-Z]+)\s+([0-9.]+)\s+([µμ]?[a-zA-Z]+)\s+([0-9.]+)\s+([µμ]?[a-zA-Z]+)\]')
+
+@functools.lru_cache(maxsize=None)
+def _parse_timestamp(timestamp):
+    """Parse a result directory name like 20240101_120000"""
+    return datetime.strptime(timestamp, "%Y%m%d_%H%M%S")
+
 def parse_benchmark_results(results_dir):
     """Parse all benchmark results in a directory"""
     all_results = []
@@ -33,19 +52,18 @@ def parse_benchmark_results(results_dir):
         print(f"Please run benchmarks first with: cargo bench")
         return []
     
-    # Find all timestamp directories
-    timestamp_dirs = sorted(glob.glob(f"{results_dir}/*"))
+    # Find all timestamp directories (DirEntry caches the type, so no extra stat)
+    with os.scandir(results_dir) as it:
+        timestamp_dirs = sorted((e for e in it if e.is_dir()), key=lambda e: e.name)
     if not timestamp_dirs:
         print(f"Warning: No benchmark results found in '{results_dir}'")
         return []
     
-    for timestamp_dir in timestamp_dirs:
-        if not os.path.isdir(timestamp_dir):
-            continue
-            
-        timestamp = os.path.basename(timestamp_dir)
+    for entry in timestamp_dirs:
+        timestamp_dir = entry.path
+        timestamp = entry.name
         try:
-            dt = datetime.strptime(timestamp, "%Y%m%d_%H%M%S")
+            dt = _parse_timestamp(timestamp)
         except ValueError:
             continue
             
@@ -55,7 +73,8 @@ def parse_benchmark_results(results_dir):
         }
         
         # Parse each benchmark file
-        bench_files = glob.glob(f"{timestamp_dir}/*.txt")
+        with os.scandir(timestamp_dir) as it:
+            bench_files = [e.path for e in it if e.is_file() and e.name.endswith('.txt')]
         if not bench_files:
             print(f"Warning: No benchmark files found in '{timestamp_dir}'")
             continue
@@ -75,9 +94,7 @@ def parse_benchmark_results(results_dir):
                 print(f"Warning: Empty benchmark file '{bench_file}'")
                 continue
                 
-            # Pattern to match benchmark results with various time units including Unicode µ
-            pattern = r'(\w+)\s+time:\s+\[([0-9.]+)\s+([µμ]?[a-zA-Z]+)\s+([0-9.]+)\s+([µμ]?[a-zA-Z]+)\s+([0-9.]+)\s+([µμ]?[a-zA-Z]+)\]'
-            matches = re.findall(pattern, content)
+            matches = _BENCH_RE.findall(content)
             
             if not matches:
                 print(f"Warning: No benchmark results found in '{bench_file}'")
@@ -95,18 +112,12 @@ def parse_benchmark_results(results_dir):
                         continue
                     
                     # Convert to nanoseconds for consistency
-                    if unit == 'ns':
-                        pass  # Already in nanoseconds
-                    elif unit in ['us', 'µs', 'μs']:  # Handle different microsecond representations
-                        mean_time *= 1000
-                    elif unit == 'ms':
-                        mean_time *= 1000000
-                    elif unit == 's':
-                        mean_time *= 1000000000
-                    else:
+                    multiplier = _UNIT_MUL.get(unit)
+                    if multiplier is None:
                         print(f"Warning: Unknown time unit '{unit}' for {test_name} in {bench_file}")
                         continue
-                        
+                    mean_time *= multiplier
+                    
                     run_results['benchmarks'][bench_name][test_name] = mean_time
                     
                 except (ValueError, IndexError) as e:
@@ -130,15 +141,23 @@ def generate_charts(results, output_dir):
         print(f"Error: Failed to create output directory '{output_dir}': {e}")
         return
     
-    # Group results by benchmark suite
-    benchmarks = defaultdict(lambda: defaultdict(list))
+    # Group results by benchmark suite, keeping every test's series aligned
+    # with timestamps (None marks runs where the test is missing)
+    benchmarks = {}
     timestamps = []
     
-    for run in results:
+    for i, run in enumerate(results):
         timestamps.append(run['timestamp'])
         for suite, tests in run['benchmarks'].items():
+            suite_series = benchmarks.setdefault(suite, {})
             for test, time in tests.items():
-                benchmarks[suite][test].append(time)
+                series = suite_series.setdefault(test, [])
+                series.extend([None] * (i - len(series)))
+                series.append(time)
+    
+    for suite_series in benchmarks.values():
+        for series in suite_series.values():
+            series.extend([None] * (len(timestamps) - len(series)))
     
     # Generate chart for each benchmark suite
     for suite, tests in benchmarks.items():
@@ -147,18 +166,13 @@ def generate_charts(results, output_dir):
             
             # Check if we have any valid data for this suite
             has_data = False
-            for test_name, times in tests.items():
-                # Pad with None for missing data points
-                padded_times = []
-                for i, run in enumerate(results):
-                    if suite in run['benchmarks'] and test_name in run['benchmarks'][suite]:
-                        padded_times.append(run['benchmarks'][suite][test_name])
-                        has_data = True
-                    else:
-                        padded_times.append(None)
-                        
-                if has_data:
-                    ax.plot(timestamps[:len(padded_times)], padded_times, marker='o', label=test_name)
+            for test_name, padded_times in tests.items():
+                if any(t is not None for t in padded_times):
+                    has_data = True
+                    # NaN entries are drawn as gaps, same as None in a list
+                    times = np.fromiter((np.nan if t is None else t for t in padded_times),
+                                        dtype=np.float64, count=len(padded_times))
+                    ax.plot(timestamps, times, marker='o', label=test_name)
             
             if not has_data:
                 print(f"Warning: No data found for benchmark suite '{suite}'")
@@ -179,7 +193,8 @@ def generate_charts(results, output_dir):
             plt.tight_layout()
             
             chart_path = f"{output_dir}/{suite}_performance.png"
-            plt.savefig(chart_path, dpi=150)
+            # Dashboard thumbnails don't need print DPI or maximum zlib effort
+            fig.savefig(chart_path, dpi=100, pil_kwargs={'compress_level': 1})
             plt.close()
             print(f"Generated chart: {chart_path}")
             
@@ -229,43 +244,44 @@ def generate_html_dashboard(results, output_dir):
 """
     
     # Generate charts section
-    charts_html = ""
+    charts = []
     for suite in ['lexer', 'parser', 'compilation', 'features', 'scenarios', 'memory', 'tooling']:
         if os.path.exists(f"{output_dir}/{suite}_performance.png"):
-            charts_html += f'<div class="chart"><h3>{suite.capitalize()}</h3><img src="{suite}_performance.png" width="800"></div>\n'
+            charts.append(f'<div class="chart"><h3>{suite.capitalize()}</h3><img src="{suite}_performance.png" width="800"></div>\n')
+    charts_html = ''.join(charts)
     
     # Generate latest results table
     if results:
         latest = results[-1]
-        latest_html = "<table><tr><th>Benchmark</th><th>Test</th><th>Time</th></tr>"
+        rows = ["<table><tr><th>Benchmark</th><th>Test</th><th>Time</th></tr>"]
         
         for suite, tests in sorted(latest['benchmarks'].items()):
             for test, time in sorted(tests.items()):
                 time_str = format_time(time)
-                latest_html += f"<tr><td>{suite}</td><td>{test}</td><td>{time_str}</td></tr>"
+                rows.append(f"<tr><td>{suite}</td><td>{test}</td><td>{time_str}</td></tr>")
         
-        latest_html += "</table>"
+        rows.append("</table>")
+        latest_html = ''.join(rows)
     else:
         latest_html = "<p>No results available</p>"
     
     # Generate comparison table (last vs previous)
-    comparison_html = ""
     if len(results) >= 2:
         latest = results[-1]
         previous = results[-2]
         
-        comparison_html = "<table><tr><th>Benchmark</th><th>Test</th><th>Previous</th><th>Latest</th><th>Change</th></tr>"
+        rows = ["<table><tr><th>Benchmark</th><th>Test</th><th>Previous</th><th>Latest</th><th>Change</th></tr>"]
         
-        for suite in latest['benchmarks']:
-            if suite not in previous['benchmarks']:
-                continue
-                
-            for test in latest['benchmarks'][suite]:
-                if test not in previous['benchmarks'][suite]:
-                    continue
-                    
-                prev_time = previous['benchmarks'][suite][test]
-                curr_time = latest['benchmarks'][suite][test]
+        # Only suites and tests present in both runs can be compared
+        common_suites = latest['benchmarks'].keys() & previous['benchmarks'].keys()
+        
+        for suite in sorted(common_suites):
+            curr_tests = latest['benchmarks'][suite]
+            prev_tests = previous['benchmarks'][suite]
+            
+            for test in sorted(curr_tests.keys() & prev_tests.keys()):
+                prev_time = prev_tests[test]
+                curr_time = curr_tests[test]
                 
                 # Prevent division by zero
                 if prev_time == 0:
@@ -277,15 +293,16 @@ def generate_html_dashboard(results, output_dir):
                     change_str = f"{change:+.1f}%" if abs(change) > 0.1 else "~"
                     change_class = "improvement" if change < 0 else "regression" if change > 5 else ""
                 
-                comparison_html += f"""<tr>
+                rows.append(f"""<tr>
                     <td>{suite}</td>
                     <td>{test}</td>
                     <td>{format_time(prev_time)}</td>
                     <td>{format_time(curr_time)}</td>
                     <td class="{change_class}">{change_str}</td>
-                </tr>"""
+                </tr>""")
         
-        comparison_html += "</table>"
+        rows.append("</table>")
+        comparison_html = ''.join(rows)
     else:
         comparison_html = "<p>Need at least 2 runs for comparison</p>"
     
@@ -305,16 +322,21 @@ def generate_html_dashboard(results, output_dir):
     except Exception as e:
         print(f"Error: Failed to write dashboard HTML: {e}")
 
+# (upper bound, divisor, format) for each display unit, smallest first
+_TIME_FORMATS = (
+    (1e3, 1, '%.0f ns'),
+    (1e6, 1e3, '%.1f μs'),
+    (1e9, 1e6, '%.1f ms'),
+    (float('inf'), 1e9, '%.2f s'),
+)
+
 def format_time(nanoseconds):
     """Format time in appropriate units"""
-    if nanoseconds < 1000:
-        return f"{nanoseconds:.0f} ns"
-    elif nanoseconds < 1000000:
-        return f"{nanoseconds/1000:.1f} μs"
-    elif nanoseconds < 1000000000:
-        return f"{nanoseconds/1000000:.1f} ms"
-    else:
-        return f"{nanoseconds/1000000000:.2f} s"
+    for limit, divisor, fmt in _TIME_FORMATS:
+        if nanoseconds < limit:
+            return fmt % (nanoseconds / divisor)
+    # Only reachable for NaN, which compares false against every bound
+    return _TIME_FORMATS[-1][2] % (nanoseconds / _TIME_FORMATS[-1][1])
 
 def main():
     """Main function to generate the performance dashboard"""
@@ -4,40 +4,40 @@
 import os
 import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
+
+# Pattern to find Lexer::new() calls that are missing .expect()
+# This pattern looks for Lexer::new(something) followed by .scan_tokens()
+_LEXER_PAT = re.compile(
+    r'let\s+(\w+)\s*=\s*Lexer::new\(([^)]+)\);\s*\n\s*let\s*\([^)]+\)\s*=\s*\1\.scan_tokens\(\)',
+    re.MULTILINE
+)
+
+def _add_expect(match):
+    """Add .expect() to the Lexer::new() call in a matched statement pair"""
+    arg = match.group(2)
+    return match.group(0).replace(
+        f"Lexer::new({arg});",
+        f'Lexer::new({arg}).expect("Failed to create lexer");'
+    )
 
 def fix_scan_tokens_in_file(filepath):
     """Fix scan_tokens errors in a single file"""
     with open(filepath, 'r') as f:
         content = f.read()
     
-    original_content = content
+    # Cheap literal check so files without any Lexer::new skip the regex
+    if 'Lexer::new' not in content:
+        return False
     
-    # Pattern to find Lexer::new() calls that are missing .expect()
-    # This pattern looks for Lexer::new(something) followed by .scan_tokens()
-    pattern = r'let\s+(\w+)\s*=\s*Lexer::new\(([^)]+)\);\s*\n\s*let\s*\([^)]+\)\s*=\s*\1\.scan_tokens\(\)'
+    original_content = content
     
-    # Find all matches
-    matches = list(re.finditer(pattern, content, re.MULTILINE))
+    # Rewrite every match in one pass instead of splicing the string per match
+    content, count = _LEXER_PAT.subn(_add_expect, content)
     
-    if not matches:
+    if not count:
         return False
     
-    # Process matches in reverse order to avoid offset issues
-    for match in reversed(matches):
-        var_name = match.group(1)
-        arg = match.group(2)
-        
-        # Replace the pattern
-        old_text = match.group(0)
-        new_text = old_text.replace(
-            f"Lexer::new({arg});",
-            f'Lexer::new({arg}).expect("Failed to create lexer");'
-        )
-        
-        start = match.start()
-        end = match.end()
-        content = content[:start] + new_text + content[end:]
-    
     # Write back if changes were made
     if content != original_content:
         with open(filepath, 'w') as f:
@@ -47,24 +47,23 @@ def fix_scan_tokens_in_file(filepath):
     return False
 
 def main():
-    # Find all Rust files in tests directory
+    # Find all Rust files in the tests and examples directories
     test_files = []
-    for root, dirs, files in os.walk('tests'):
-        for file in files:
-            if file.endswith('.rs'):
-                test_files.append(os.path.join(root, file))
-    
-    # Also check examples
-    for root, dirs, files in os.walk('examples'):
-        for file in files:
-            if file.endswith('.rs'):
-                test_files.append(os.path.join(root, file))
+    for directory in ('tests', 'examples'):
+        for root, dirs, files in os.walk(directory):
+            for file in files:
+                if file.endswith('.rs'):
+                    test_files.append(os.path.join(root, file))
     
+    # Files are independent and the work is mostly reads/writes, which
+    # release the GIL, so a thread pool is enough to overlap them
+    max_workers = min(32, (os.cpu_count() or 1) * 4)
     fixed_count = 0
-    for filepath in test_files:
-        if fix_scan_tokens_in_file(filepath):
-            print(f"Fixed: {filepath}")
-            fixed_count += 1
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for filepath, fixed in zip(test_files, executor.map(fix_scan_tokens_in_file, test_files)):
+            if fixed:
+                print(f"Fixed: {filepath}")
+                fixed_count += 1
     
     print(f"\nTotal files fixed: {fixed_count}")
 
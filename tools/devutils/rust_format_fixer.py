@@ -8,153 +8,218 @@ especially those that arise when migrating to newer Rust versions.
 
 import re
 import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import accumulate
 from pathlib import Path
 from typing import List, Tuple, Optional
 
 
 class RustFormatFixer:
-    """Utility class for fixing Rust format string issues."""
+    """Utility class for fixing Rust format string issues.
+    
+    Files are processed as raw bytes, so all patterns and replacements are
+    bytes too and no decode/encode pass is needed per file.
+    """
     
     def __init__(self):
+        # Patterns are compiled once up front; every file pass reuses them.
         self.common_patterns = [
             # Fix inline format arguments (Rust 2021 edition)
-            (r'format!\("([^"]*?)\{\}", ([^)]+)\)',
-             lambda m: f'format!("{m.group(1)}{{{m.group(2)}}}")'),
+            (re.compile(rb'format!\("([^"]*?)\{\}", ([^)]+)\)'),
+             lambda m: b'format!("' + m.group(1) + b'{' + m.group(2) + b'}")'),
             
             # Fix panic! with inline arguments
-            (r'panic!\("([^"]*?)\{\}", ([^)]+)\)',
-             lambda m: f'panic!("{m.group(1)}{{{m.group(2)}}}")'),
+            (re.compile(rb'panic!\("([^"]*?)\{\}", ([^)]+)\)'),
+             lambda m: b'panic!("' + m.group(1) + b'{' + m.group(2) + b'}")'),
             
             # Fix println! with inline arguments
-            (r'println!\("([^"]*?)\{\}", ([^)]+)\)',
-             lambda m: f'println!("{m.group(1)}{{{m.group(2)}}}")'),
+            (re.compile(rb'println!\("([^"]*?)\{\}", ([^)]+)\)'),
+             lambda m: b'println!("' + m.group(1) + b'{' + m.group(2) + b'}")'),
             
             # Fix eprintln! with inline arguments
-            (r'eprintln!\("([^"]*?)\{\}", ([^)]+)\)',
-             lambda m: f'eprintln!("{m.group(1)}{{{m.group(2)}}}")'),
+            (re.compile(rb'eprintln!\("([^"]*?)\{\}", ([^)]+)\)'),
+             lambda m: b'eprintln!("' + m.group(1) + b'{' + m.group(2) + b'}")'),
         ]
         
         self.error_patterns = [
             # Missing closing parenthesis in Error::key_not_found
-            (r'Error::key_not_found\(format!\("([^"]+)", ([^)]+)\)(?!\))',
-             r'Error::key_not_found(format!("\1", \2))'),
+            (re.compile(rb'Error::key_not_found\(format!\("([^"]+)", ([^)]+)\)(?!\))', re.MULTILINE),
+             rb'Error::key_not_found(format!("\1", \2))'),
             
             # Missing closing parenthesis in ok_or_else
-            (r'\.ok_or_else\(\|\| Error::key_not_found\(format!\("([^"]+)", ([^)]+)\)(?!\))',
-             r'.ok_or_else(|| Error::key_not_found(format!("\1", \2)))'),
+            (re.compile(rb'\.ok_or_else\(\|\| Error::key_not_found\(format!\("([^"]+)", ([^)]+)\)(?!\))', re.MULTILINE),
+             rb'.ok_or_else(|| Error::key_not_found(format!("\1", \2)))'),
             
             # Extra parentheses cleanup
-            (r'\)\)\)\)\);', r')));'),
-            (r'\)\)\)\);', r'));'),
+            (re.compile(rb'\)\)\)\)\);', re.MULTILINE), rb')));'),
+            (re.compile(rb'\)\)\)\);', re.MULTILINE), rb'));'),
         ]
+        
+        # Literal substrings at least one of the patterns above needs in
+        # order to match. Files containing none of them are skipped by the
+        # analysis without running any regex.
+        self.pattern_markers = (
+            b'format!(',
+            b'panic!(',
+            b'println!(',
+            b'Error::key_not_found',
+            b'))));',
+        )
     
-    def fix_inline_format_args(self, content: str) -> Tuple[str, int]:
+    def fix_inline_format_args(self, content: bytes) -> Tuple[bytes, int]:
         """Fix format strings to use inline format arguments (Rust 2021)."""
         changes = 0
         
         for pattern, replacement in self.common_patterns:
-            if callable(replacement):
-                new_content = re.sub(pattern, replacement, content)
-            else:
-                new_content = re.sub(pattern, replacement, content)
-            
-            if new_content != content:
-                changes += len(re.findall(pattern, content))
-                content = new_content
+            content, n = pattern.subn(replacement, content)
+            changes += n
         
         return content, changes
     
-    def fix_missing_parentheses(self, content: str) -> Tuple[str, int]:
+    def fix_missing_parentheses(self, content: bytes) -> Tuple[bytes, int]:
         """Fix missing or extra parentheses in format! calls."""
         changes = 0
         
         for pattern, replacement in self.error_patterns:
-            new_content = re.sub(pattern, replacement, content, flags=re.MULTILINE)
-            if new_content != content:
-                changes += len(re.findall(pattern, content, flags=re.MULTILINE))
-                content = new_content
+            content, n = pattern.subn(replacement, content)
+            changes += n
         
         return content, changes
     
-    def fix_multiline_format(self, content: str) -> Tuple[str, int]:
+    def fix_multiline_format(self, content: bytes) -> Tuple[bytes, int]:
         """Fix multiline format! calls with missing parentheses."""
+        if b'return Err(Error::' not in content:
+            return content, 0
+        
         changes = 0
-        lines = content.split('\n')
+        lines = content.split(b'\n')
         
-        i = 0
-        while i < len(lines):
-            line = lines[i]
-            
+        # Prefix sums of parenthesis counts, so the balance of any line range
+        # i..j is opens[j + 1] - opens[i] instead of a rescan of the lines
+        opens = [0, *accumulate(line.count(b'(') for line in lines)]
+        closes = [0, *accumulate(line.count(b')') for line in lines)]
+        # (line index, closing parentheses added) for every line fixed below
+        fixed_lines = []
+        
+        for i, line in enumerate(lines):
             # Detect start of a multiline format! call
-            if 'return Err(Error::' in line and 'format!(' in line:
+            if b'return Err(Error::' in line and b'format!(' in line:
                 # Look for the closing ); in next few lines
                 for j in range(i + 1, min(i + 6, len(lines))):
-                    if lines[j].strip().endswith(');'):
+                    if lines[j].strip().endswith(b');'):
                         # Check if we need more closing parentheses
-                        open_count = 0
-                        close_count = 0
-                        for k in range(i, j + 1):
-                            open_count += lines[k].count('(')
-                            close_count += lines[k].count(')')
+                        open_count = opens[j + 1] - opens[i]
+                        close_count = closes[j + 1] - closes[i]
+                        
+                        # Fixed lines only ever move forward, so the ones
+                        # inside this range are at the end of the list
+                        for k, added in reversed(fixed_lines):
+                            if k < i:
+                                break
+                            close_count += added
                         
                         if open_count > close_count:
-                            lines[j] = lines[j].replace(');', ')' * (open_count - close_count + 1) + ';')
+                            fixed = lines[j].replace(b');', b')' * (open_count - close_count + 1) + b';')
+                            fixed_lines.append((j, fixed.count(b')') - lines[j].count(b')')))
+                            lines[j] = fixed
                             changes += 1
                         break
-            
-            i += 1
         
-        return '\n'.join(lines), changes
+        return b'\n'.join(lines), changes
+    
+    def fix_file_content(self, content: bytes) -> Tuple[bytes, int]:
+        """Apply all fixes to raw (undecoded) file content."""
+        total_changes = 0
+        
+        content, changes = self.fix_inline_format_args(content)
+        total_changes += changes
+        
+        content, changes = self.fix_missing_parentheses(content)
+        total_changes += changes
+        
+        content, changes = self.fix_multiline_format(content)
+        total_changes += changes
+        
+        return content, total_changes
     
-    def fix_file(self, filepath: str, backup: bool = True) -> bool:
-        """Fix format issues in a single Rust file."""
+    def fix_file(self, filepath: str, backup: bool = True, dry_run: bool = False) -> bool:
+        """Fix format issues in a single Rust file.
+        
+        The file is read once and only rewritten (and backed up) when the
+        fixes actually change its content. With ``dry_run`` nothing is written.
+        """
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
+            with open(filepath, 'rb') as f:
                 content = f.read()
             
-            if backup:
-                backup_path = f"{filepath}.backup"
-                with open(backup_path, 'w', encoding='utf-8') as f:
-                    f.write(content)
-            
-            # Apply all fixes
-            total_changes = 0
-            
-            content, changes = self.fix_inline_format_args(content)
-            total_changes += changes
+            new_content, total_changes = self.fix_file_content(content)
             
-            content, changes = self.fix_missing_parentheses(content)
-            total_changes += changes
+            if new_content == content:
+                return False
             
-            content, changes = self.fix_multiline_format(content)
-            total_changes += changes
+            if dry_run:
+                print(f"Would fix: {filepath} ({total_changes} changes)")
+                return True
             
-            if total_changes > 0:
-                with open(filepath, 'w', encoding='utf-8') as f:
+            if backup:
+                backup_path = f"{filepath}.backup"
+                with open(backup_path, 'wb') as f:
                     f.write(content)
-                print(f"Fixed: {filepath} ({total_changes} changes)")
-                return True
             
-            return False
+            _write_atomic(filepath, new_content)
+            print(f"Fixed: {filepath} ({total_changes} changes)")
+            return True
             
         except Exception as e:
             print(f"Error processing {filepath}: {e}")
             return False
     
-    def fix_directory(self, directory: str = "src", extensions: List[str] = [".rs"]) -> int:
-        """Fix format issues in all Rust files in a directory."""
-        fixed_files = 0
+    def fix_directory(self, directory: str = "src", extensions: List[str] = [".rs"],
+                      backup: bool = True, dry_run: bool = False,
+                      jobs: Optional[int] = None) -> int:
+        """Fix format issues in all Rust files in a directory.
         
-        for root, _, files in os.walk(directory):
-            for file in files:
-                if any(file.endswith(ext) for ext in extensions):
-                    filepath = os.path.join(root, file)
-                    if self.fix_file(filepath):
-                        fixed_files += 1
+        Files are independent, so they are processed in a pool of ``jobs``
+        worker processes (default: one per CPU).
+        """
+        filepaths = _collect_files(directory, extensions)
+        fix_one = partial(_fix_one, backup=backup, dry_run=dry_run)
         
-        return fixed_files
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                 initargs=(type(self),)) as executor:
+            results = executor.map(fix_one, filepaths, chunksize=_CHUNKSIZE)
+            return sum(1 for fixed in results if fixed)
     
-    def analyze_format_issues(self, directory: str = "src") -> dict:
+    def analyze_file(self, filepath: str) -> Optional[Tuple[int, int]]:
+        """Count inline-args and parentheses pattern matches in one file.
+        
+        Returns ``None`` if the file could not be read.
+        """
+        try:
+            with open(filepath, 'rb') as f:
+                content = f.read()
+        except Exception as e:
+            print(f"Error analyzing {filepath}: {e}")
+            return None
+        
+        if not any(marker in content for marker in self.pattern_markers):
+            return 0, 0
+        
+        inline_format_args = 0
+        missing_parentheses = 0
+        
+        for pattern, _ in self.common_patterns:
+            inline_format_args += len(pattern.findall(content))
+        
+        for pattern, _ in self.error_patterns:
+            missing_parentheses += len(pattern.findall(content))
+        
+        return inline_format_args, missing_parentheses
+    
+    def analyze_format_issues(self, directory: str = "src",
+                              jobs: Optional[int] = None) -> dict:
         """Analyze format issues without fixing them."""
         issues = {
             'inline_format_args': 0,
@@ -163,36 +228,90 @@ class RustFormatFixer:
             'files_with_issues': []
         }
         
-        for root, _, files in os.walk(directory):
-            for file in files:
-                if file.endswith('.rs'):
-                    filepath = os.path.join(root, file)
-                    try:
-                        with open(filepath, 'r', encoding='utf-8') as f:
-                            content = f.read()
-                        
-                        # Check for issues
-                        file_has_issues = False
-                        
-                        for pattern, _ in self.common_patterns:
-                            if re.search(pattern, content):
-                                issues['inline_format_args'] += 1
-                                file_has_issues = True
-                        
-                        for pattern, _ in self.error_patterns:
-                            if re.search(pattern, content):
-                                issues['missing_parentheses'] += 1
-                                file_has_issues = True
-                        
-                        if file_has_issues:
-                            issues['files_with_issues'].append(filepath)
-                            
-                    except Exception as e:
-                        print(f"Error analyzing {filepath}: {e}")
+        filepaths = _collect_files(directory, [".rs"])
+        
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                 initargs=(type(self),)) as executor:
+            results = executor.map(_analyze_one, filepaths, chunksize=_CHUNKSIZE)
+            for filepath, counts in zip(filepaths, results):
+                if counts is None:
+                    continue
+                
+                inline_format_args, missing_parentheses = counts
+                issues['inline_format_args'] += inline_format_args
+                issues['missing_parentheses'] += missing_parentheses
+                
+                if inline_format_args or missing_parentheses:
+                    issues['files_with_issues'].append(filepath)
         
         return issues
 
 
+# Number of files handed to a worker process per task.
+_CHUNKSIZE = 32
+
+# Per-process fixer used by the pool workers. Each worker builds its own
+# instance instead of receiving one, since the replacement lambdas in the
+# pattern tables can't be pickled.
+_worker_fixer: Optional[RustFormatFixer] = None
+
+
+def _init_worker(fixer_cls: type) -> None:
+    global _worker_fixer
+    _worker_fixer = fixer_cls()
+
+
+def _fix_one(filepath: str, backup: bool, dry_run: bool) -> bool:
+    return _worker_fixer.fix_file(filepath, backup=backup, dry_run=dry_run)
+
+
+def _analyze_one(filepath: str) -> Optional[Tuple[int, int]]:
+    return _worker_fixer.analyze_file(filepath)
+
+
+def _write_atomic(filepath: str, data: bytes) -> None:
+    """Replace filepath with data so a failed write never truncates it.
+    
+    Symlinks are resolved first so the file they point to is rewritten and
+    the link itself is left in place.
+    """
+    target = os.path.realpath(filepath)
+    tmp_path = f"{target}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        shutil.copymode(target, tmp_path)
+        os.replace(tmp_path, target)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _collect_files(directory: str, extensions: List[str]) -> List[str]:
+    """List files under directory whose names end with one of extensions."""
+    filepaths = []
+    
+    for root, _, files in os.walk(directory):
+        for file in files:
+            if any(file.endswith(ext) for ext in extensions):
+                filepaths.append(os.path.join(root, file))
+    
+    return filepaths
+
+def _positive_int(value: str) -> int:
+    """argparse type for options that need a count of at least 1."""
+    import argparse
+    
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{value}'")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
 def main():
     """Command-line interface for the format fixer."""
     import argparse
@@ -204,15 +323,19 @@ def main():
                         help="Directory to process (default: src)")
     parser.add_argument('--no-backup', action='store_true',
                         help="Don't create backup files")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Report files that would be fixed without writing them")
     parser.add_argument('--file', '-f',
                         help="Fix a specific file instead of directory")
+    parser.add_argument('--jobs', '-j', type=_positive_int,
+                        help="Number of worker processes (default: CPU count)")
     
     args = parser.parse_args()
     
     fixer = RustFormatFixer()
     
     if args.action == 'analyze':
-        issues = fixer.analyze_format_issues(args.directory)
+        issues = fixer.analyze_format_issues(args.directory, jobs=args.jobs)
         print("\nFormat Issues Analysis:")
         print(f"  Inline format args needed: {issues['inline_format_args']}")
         print(f"  Missing parentheses: {issues['missing_parentheses']}")
@@ -226,11 +349,19 @@ def main():
     
     elif args.action == 'fix':
         if args.file:
-            success = fixer.fix_file(args.file, backup=not args.no_backup)
-            print(f"\nFixed: {success}")
+            success = fixer.fix_file(args.file, backup=not args.no_backup,
+                                     dry_run=args.dry_run)
+            if args.dry_run:
+                print(f"\nWould fix: {success}")
+            else:
+                print(f"\nFixed: {success}")
         else:
-            fixed = fixer.fix_directory(args.directory)
-            print(f"\nFixed {fixed} files")
+            fixed = fixer.fix_directory(args.directory, backup=not args.no_backup,
+                                        dry_run=args.dry_run, jobs=args.jobs)
+            if args.dry_run:
+                print(f"\nWould fix {fixed} files")
+            else:
+                print(f"\nFixed {fixed} files")
 
 
 if __name__ == "__main__":
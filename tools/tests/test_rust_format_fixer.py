@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Tests for the Rust format string fixer.
+
+Run with:
+    python -m unittest discover tools/tests
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+# Add tools directory to path to import devutils
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from devutils.rust_format_fixer import RustFormatFixer
+
+
+UNFIXED = b'fn main() {\n    let s = format!("a {}", b);\n}\n'
+FIXED = b'fn main() {\n    let s = format!("a {b}");\n}\n'
+
+
+@unittest.skipUnless(hasattr(os, 'symlink'), "symlinks not supported")
+class SymlinkTest(unittest.TestCase):
+    """Fixing a symlinked file rewrites its target and keeps the link."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        os.makedirs(os.path.join(root, 'real'))
+        os.makedirs(os.path.join(root, 'src'))
+
+        self.target = os.path.join(root, 'real', 't.rs')
+        with open(self.target, 'wb') as f:
+            f.write(UNFIXED)
+
+        self.src_dir = os.path.join(root, 'src')
+        self.link = os.path.join(self.src_dir, 't.rs')
+        os.symlink(os.path.join('..', 'real', 't.rs'), self.link)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def assert_fixed_through_link(self):
+        self.assertTrue(os.path.islink(self.link))
+        with open(self.target, 'rb') as f:
+            self.assertEqual(f.read(), FIXED)
+        self.assertFalse(os.path.exists(f"{self.target}.tmp"))
+
+    def test_fix_file(self):
+        self.assertTrue(RustFormatFixer().fix_file(self.link, backup=False))
+        self.assert_fixed_through_link()
+
+    def test_fix_directory(self):
+        fixed = RustFormatFixer().fix_directory(self.src_dir, backup=False, jobs=1)
+        self.assertEqual(fixed, 1)
+        self.assert_fixed_through_link()
+
+
+if __name__ == '__main__':
+    unittest.main()